@@ -3,16 +3,26 @@
 
 import re
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from .config import get_config
 
 
+# Version patterns in `darktable-cli --version` output
+_VERSION_RE_NAMED = re.compile(r'darktable[- ]cli\s+(\d+\.\d+\.\d+)', re.IGNORECASE)
+_VERSION_RE_FALLBACK = re.compile(r'(\d+\.\d+\.\d+)')
+
+
+@lru_cache(maxsize=1)
 def validate_installation() -> dict:
     """
     Validate that darktable-cli is installed and accessible.
     
+    The result is cached for the lifetime of the process; treat it as
+    read-only.
+    
     Returns:
         dict with keys:
             - 'darktable_ok': bool
@@ -43,10 +53,14 @@ def validate_installation() -> dict:
     return result
 
 
+@lru_cache(maxsize=1)
 def get_darktable_version() -> Optional[str]:
     """
     Get the installed darktable-cli version.
     
+    The configured darktable-cli does not change during a run, so the
+    `--version` subprocess is only spawned once per process.
+    
     Returns:
         Version string (e.g., "5.4.0") or None
     """
@@ -63,12 +77,12 @@ def get_darktable_version() -> Optional[str]:
         
         # Parse version from output
         output = result.stdout + result.stderr
-        match = re.search(r'darktable[- ]cli\s+(\d+\.\d+\.\d+)', output, re.IGNORECASE)
+        match = _VERSION_RE_NAMED.search(output)
         if match:
             return match.group(1)
         
         # Try simpler pattern
-        match = re.search(r'(\d+\.\d+\.\d+)', output)
+        match = _VERSION_RE_FALLBACK.search(output)
         if match:
             return match.group(1)
             
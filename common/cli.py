@@ -1,15 +1,53 @@
 # CLI module
 """Command-line interface for raw2jpeg."""
 
-import argparse
+from __future__ import annotations
+
 import sys
-from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional
 
 from .config import CONFIG_FILE, create_config_file, get_config
 
 
+# Short usage shown when no conversion arguments are given (full help: --help)
+USAGE = """\
+usage: raw2jpeg --inpath INPATH [--outpath OUTPATH] [--quiet] [--resume] [-y] [--sleep]
+                [--no-update-check]
+       raw2jpeg --configure | --check-update | --validate
+
+Run 'raw2jpeg --help' for the full list of options."""
+
+# Options that take a value, mapped to their destination attribute
+_VALUE_OPTIONS = {
+    '--inpath': 'inpath',
+    '--outpath': 'outpath',
+}
+
+# Boolean switches, mapped to their destination attribute
+_FLAG_OPTIONS = {
+    '--quiet': 'quiet',
+    '--resume': 'resume',
+    '-y': 'yes',
+    '--yes': 'yes',
+    '--sleep': 'sleep',
+    '--no-update-check': 'no_update_check',
+    '--configure': 'configure',
+    '--check-update': 'check_update',
+    '--validate': 'validate',
+}
+
+
 def create_parser() -> argparse.ArgumentParser:
-    """Create the argument parser."""
+    """
+    Create the argument parser.
+    
+    Only used for --help and error reporting; regular invocations are
+    handled by parse_args() without building the parser.
+    """
+    import argparse
+    from pathlib import Path
+    
     parser = argparse.ArgumentParser(
         prog='raw2jpeg',
         description='Batch convert RAW files to JPEG using darktable-cli',
@@ -58,6 +96,12 @@ Examples:
         action='store_true',
         help='Put the system to sleep after processing all folders',
     )
+    parser.add_argument(
+        '--no-update-check',
+        action='store_true',
+        help='Skip the darktable update check for this run '
+             '(or set RAW2JPEG_NO_UPDATE_CHECK=1)',
+    )
     
     # Utility commands
     parser.add_argument(
@@ -79,6 +123,42 @@ Examples:
     return parser
 
 
+def parse_args(argv: Optional[List[str]] = None) -> SimpleNamespace:
+    """
+    Parse command-line arguments.
+    
+    Known options are scanned in a single pass. Anything else (--help,
+    abbreviated or unknown options, missing values) is handed over to
+    argparse, which prints help or the usual error message and exits.
+    """
+    from pathlib import Path
+    
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    values = {dest: None for dest in _VALUE_OPTIONS.values()}
+    values.update((dest, False) for dest in _FLAG_OPTIONS.values())
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in _FLAG_OPTIONS:
+            values[_FLAG_OPTIONS[arg]] = True
+        else:
+            name, sep, value = arg.partition('=')
+            if name not in _VALUE_OPTIONS:
+                return create_parser().parse_args(argv)
+            if not sep:
+                i += 1
+                if i == len(argv) or argv[i].startswith('-'):
+                    return create_parser().parse_args(argv)
+                value = argv[i]
+            values[_VALUE_OPTIONS[name]] = Path(value)
+        i += 1
+    
+    return SimpleNamespace(**values)
+
+
 def handle_configure() -> int:
     """Create config.ini with default values."""
     if CONFIG_FILE.exists():
@@ -96,7 +176,11 @@ def handle_configure() -> int:
 
 def handle_check_update() -> int:
     """Check for darktable updates."""
-    from .updater import UpdateMonitor, format_update_message
+    from .updater import NO_UPDATE_CHECK_ENV, UpdateMonitor, format_update_message, update_check_disabled
+    
+    if update_check_disabled():
+        print(f"Update checks are disabled ({NO_UPDATE_CHECK_ENV} is set).")
+        return 1
     
     print("Checking for darktable updates...")
     monitor = UpdateMonitor()
@@ -132,12 +216,12 @@ def handle_validate() -> int:
     return 0
 
 
-def run_conversion(args: argparse.Namespace) -> int:
+def run_conversion(args: SimpleNamespace) -> int:
     """Run the main conversion workflow."""
     from .capability import validate_installation
     from .executor import SandboxExecutor
     from .planner import create_conversion_jobs, discover_leaf_folders, get_default_outpath
-    from .updater import UpdateMonitor, format_update_message
+    from .updater import UpdateMonitor, format_update_message, update_check_disabled
     
     config = get_config()
     
@@ -150,30 +234,28 @@ def run_conversion(args: argparse.Namespace) -> int:
         print("\nRun with --validate for more details.")
         return 1
     
-    # Check for updates if enabled
-    if config.check_updates:
+    # Check for updates in the background if enabled; reported after the summary
+    monitor = None
+    if config.check_updates and not args.no_update_check and not update_check_disabled():
         try:
             monitor = UpdateMonitor()
-            update_check = monitor.check_for_updates()
-            if update_check and update_check['update_available']:
-                print(format_update_message(update_check))
+            monitor.start_async()
         except Exception:
-            pass  # Don't fail on update check errors
+            monitor = None  # Don't fail on update check errors
     
-    # Determine paths
+    # Determine paths (resolved once; everything below works on these)
     inpath = args.inpath.resolve()
     outpath = args.outpath.resolve() if args.outpath else get_default_outpath(inpath)
     
-    if args.outpath and not outpath.exists():
-        if not args.yes:
+    if not outpath.exists():
+        # Only an explicitly given outpath needs confirmation
+        if args.outpath and not args.yes:
             print(f"⚠️  Output directory does not exist: {outpath}")
             response = input("Create it and proceed? [y/N]: ").strip().lower()
             if response != 'y':
                 print("Aborted.")
                 return 1
         outpath.mkdir(parents=True, exist_ok=True)
-    elif not outpath.exists():
-        outpath.mkdir(parents=True, exist_ok=True)
     
     print(f"\n📁 Input:  {inpath}")
     print(f"📁 Output: {outpath}")
@@ -201,8 +283,8 @@ def run_conversion(args: argparse.Namespace) -> int:
     executor = SandboxExecutor(quiet=args.quiet)
     results = executor.execute_jobs(jobs)
     
-    # Retry failed jobs if --resume is set
-    if args.resume and results['failed_jobs']:
+    # Retry failed jobs if --resume is set, unless the run was interrupted
+    if args.resume and results['failed_jobs'] and not results['interrupted']:
         print(f"\n🔄 Retrying {len(results['failed_jobs'])} failed jobs...")
         retry_results = executor.retry_failed_jobs(results['failed_jobs'])
         
@@ -224,6 +306,11 @@ def run_conversion(args: argparse.Namespace) -> int:
         print(f"\n⚠️  Some folders failed.")
         for job in results['failed_jobs']:
             print(f"   ✗ {job['input_folder']}")
+    
+    if monitor:
+        update_check = monitor.async_result()
+        if update_check and update_check['update_available']:
+            print(format_update_message(update_check))
             
     if args.sleep:
         import os
@@ -235,10 +322,9 @@ def run_conversion(args: argparse.Namespace) -> int:
     return 1 if results['failed'] > 0 else 0
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point."""
-    parser = create_parser()
-    args = parser.parse_args()
+    args = parse_args(argv)
     
     # Handle utility commands first
     if args.configure:
@@ -252,7 +338,7 @@ def main() -> int:
     
     # Require inpath for conversion
     if not args.inpath:
-        parser.print_help()
+        print(USAGE)
         print("\n❌ Error: --inpath is required for conversion.")
         return 1
     
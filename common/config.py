@@ -1,8 +1,12 @@
 # Configuration for RAW to JPEG converter
 """Configuration constants and config.ini management."""
 
+from __future__ import annotations
+
 import configparser
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -23,10 +27,12 @@ DEFAULTS = {
         'cpu_threads_gpu_instance': '4',
         'cpu_threads_cpu_instance': '4',
         'reserved_core_count': '4',
+        'sandbox_cachedir': 'false',
         'max_retry': '5',
     },
     'updates': {
         'check_updates': 'true',
+        'soft_ttl_days': '1',
         'cache_days': '7',
     },
 }
@@ -41,6 +47,9 @@ COMMENTS = {
     'cpu_threads_gpu_instance': '# Number of CPU thread cores utilized per darktable-cli GPU instance worker process.',
     'cpu_threads_cpu_instance': '# Number of CPU thread cores utilized per fallback CPU-only worker process.',
     'reserved_core_count': '# Number of CPU thread cores reserved for the OS/background tasks (minimum 1).',
+    'sandbox_cachedir': '# Give every worker its own darktable --cachedir instead of the shared default one.',
+    'soft_ttl_days': '# Days a release check is reused as-is before GitHub is asked (cheaply) whether it changed.',
+    'cache_days': '# Days after which the cached release is discarded and fetched again in full.',
     'gpu_instances': '# Max limit of processes assigned GPU affinity. (Others will default to CPU profiles).',
 }
 
@@ -58,14 +67,17 @@ def get_default_config() -> configparser.ConfigParser:
 
 def create_config_file(path: Path = CONFIG_FILE) -> None:
     """Create config.ini with default values and descriptive comments."""
-    with open(path, 'w') as f:
-        for section, values in DEFAULTS.items():
-            f.write(f"[{section}]\n")
-            for key, val in values.items():
-                if key in COMMENTS:
-                    f.write(f"{COMMENTS[key]}\n")
-                f.write(f"{key} = {val}\n\n" if key in COMMENTS else f"{key} = {val}\n")
-            f.write("\n")
+    parts = []
+    for section, values in DEFAULTS.items():
+        parts.append(f"[{section}]\n")
+        for key, val in values.items():
+            if key in COMMENTS:
+                parts.append(f"{COMMENTS[key]}\n{key} = {val}\n\n")
+            else:
+                parts.append(f"{key} = {val}\n")
+        parts.append("\n")
+    
+    Path(path).write_text("".join(parts))
 
 
 def load_config(path: Path = CONFIG_FILE) -> configparser.ConfigParser:
@@ -76,68 +88,55 @@ def load_config(path: Path = CONFIG_FILE) -> configparser.ConfigParser:
     return config
 
 
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Configuration wrapper with typed access."""
-    
-    def __init__(self, config_path: Optional[Path] = None):
-        self._config = load_config(config_path or CONFIG_FILE)
-    
-    @property
-    def darktable_cli(self) -> Path:
-        return Path(self._config.get('paths', 'darktable_cli'))
-    
-    @property
-    def default_width(self) -> int:
-        return self._config.getint('output', 'default_width')
+    """Typed, read-only configuration values."""
     
-    @property
-    def default_height(self) -> int:
-        return self._config.getint('output', 'default_height')
+    darktable_cli: Path
     
-    @property
-    def jpeg_quality(self) -> int:
-        return self._config.getint('output', 'jpeg_quality')
+    default_width: int
+    default_height: int
+    jpeg_quality: int
     
-    @property
-    def max_workers(self) -> int:
-        return self._config.getint('performance', 'max_workers')
+    max_workers: int
+    gpu_instances: int
+    cpu_threads_gpu_instance: int
+    cpu_threads_cpu_instance: int
+    reserved_core_count: int
+    sandbox_cachedir: bool
+    max_retry: int
     
-    @property
-    def gpu_instances(self) -> int:
-        return self._config.getint('performance', 'gpu_instances')
-        
-    @property
-    def cpu_threads_gpu_instance(self) -> int:
-        return self._config.getint('performance', 'cpu_threads_gpu_instance')
-        
-    @property
-    def cpu_threads_cpu_instance(self) -> int:
-        return self._config.getint('performance', 'cpu_threads_cpu_instance')
-        
-    @property
-    def reserved_core_count(self) -> int:
-        return self._config.getint('performance', 'reserved_core_count')
-    
-    @property
-    def max_retry(self) -> int:
-        return self._config.getint('performance', 'max_retry')
-        
-    @property
-    def check_updates(self) -> bool:
-        return self._config.getboolean('updates', 'check_updates')
-    
-    @property
-    def cache_days(self) -> int:
-        return self._config.getint('updates', 'cache_days')
-
-
-# Global config instance (lazy loaded)
-_config: Optional[Config] = None
+    check_updates: bool
+    soft_ttl_days: int
+    cache_days: int
 
 
+def _build_config(config_path: Optional[Path] = None) -> Config:
+    """Read config.ini once and convert every value to its final type."""
+    parser = load_config(config_path or CONFIG_FILE)
+    get = parser.get
+    getint = parser.getint
+    getboolean = parser.getboolean
+    
+    return Config(
+        darktable_cli=Path(get('paths', 'darktable_cli')),
+        default_width=getint('output', 'default_width'),
+        default_height=getint('output', 'default_height'),
+        jpeg_quality=getint('output', 'jpeg_quality'),
+        max_workers=getint('performance', 'max_workers'),
+        gpu_instances=getint('performance', 'gpu_instances'),
+        cpu_threads_gpu_instance=getint('performance', 'cpu_threads_gpu_instance'),
+        cpu_threads_cpu_instance=getint('performance', 'cpu_threads_cpu_instance'),
+        reserved_core_count=getint('performance', 'reserved_core_count'),
+        sandbox_cachedir=getboolean('performance', 'sandbox_cachedir'),
+        max_retry=getint('performance', 'max_retry'),
+        check_updates=getboolean('updates', 'check_updates'),
+        soft_ttl_days=getint('updates', 'soft_ttl_days'),
+        cache_days=getint('updates', 'cache_days'),
+    )
+
+
+@lru_cache(maxsize=1)
 def get_config() -> Config:
-    """Get the global config instance."""
-    global _config
-    if _config is None:
-        _config = Config()
-    return _config
+    """Get the global config instance (loaded on first use)."""
+    return _build_config()
@@ -1,25 +1,55 @@
 # executor.py
 """Sandboxed parallel execution with thread affinity and GPU management."""
 
+import atexit
 import os
 import re
 import signal
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 import shutil
 import queue
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Callable, Dict, List, Optional, Set
 
 from tqdm import tqdm
 
 from .config import get_config
-from .utils import to_forward_slashes
 
 
+# RAW file paths reported in darktable-cli error output
+_FAILED_FILE_RE = re.compile(r'([A-Za-z]:[^\s]+\.(?:arw|cr2|cr3|nef|dng))', re.IGNORECASE)
+
+# Process creation flags and access rights used to pin workers (Windows only)
+_CREATE_SUSPENDED = 0x00000004
+_CREATE_NO_WINDOW = 0x08000000
+_PROCESS_SET_INFORMATION = 0x0200
+_PROCESS_SUSPEND_RESUME = 0x0800
+
+if sys.platform == 'win32':
+    import ctypes
+    from ctypes import wintypes
+    
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _kernel32.OpenProcess.restype = wintypes.HANDLE
+    _kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    _kernel32.SetProcessAffinityMask.argtypes = (wintypes.HANDLE, ctypes.c_size_t)
+    _kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    
+    _ntdll = ctypes.WinDLL('ntdll')
+    _ntdll.NtResumeProcess.restype = ctypes.c_long  # NTSTATUS, 0 on success
+    _ntdll.NtResumeProcess.argtypes = (wintypes.HANDLE,)
+
+# Parent directory of the per-worker darktable sandboxes. Point
+# RAW2JPEG_SANDBOX_ROOT at a RAM disk to keep darktable's config writes off
+# physical storage.
+SANDBOX_ROOT = os.environ.get('RAW2JPEG_SANDBOX_ROOT') or tempfile.gettempdir()
+
 # Global shutdown flag
 _shutdown_requested = False
 
@@ -37,12 +67,81 @@ def _signal_handler(signum, frame):
     print("   (Press Ctrl+C again to force quit)")
 
 
-def get_affinity_mask(start_thread: int, end_thread: int) -> str:
-    """Calculates the hex mask for a range of threads (0-indexed)."""
-    mask = 0
-    for i in range(start_thread, end_thread + 1):
-        mask |= (1 << i)
-    return hex(mask).replace("0x", "").upper()
+def get_affinity_mask(start_thread: int, end_thread: int) -> int:
+    """
+    Calculates the affinity bit mask for a range of threads (0-indexed).
+    
+    Example: (8, 11) -> 0xF00
+    """
+    return ((1 << (end_thread - start_thread + 1)) - 1) << start_thread
+
+
+def _spawn_pinned(argv: List[str], affinity_mask: int, **popen_kwargs) -> subprocess.Popen:
+    """
+    Start a process restricted to the CPU threads set in affinity_mask.
+    
+    On Windows the process is created suspended, pinned with
+    SetProcessAffinityMask and only then resumed, so it never runs (or sizes
+    its thread pool) outside its threads. Elsewhere the affinity is applied
+    right after the process starts.
+    """
+    if sys.platform != 'win32':
+        proc = subprocess.Popen(argv, **popen_kwargs)
+        if hasattr(os, 'sched_setaffinity'):
+            cpus = {i for i in range(affinity_mask.bit_length()) if affinity_mask >> i & 1}
+            try:
+                os.sched_setaffinity(proc.pid, cpus)
+            except OSError:
+                proc.kill()
+                proc.wait()
+                raise
+        return proc
+    
+    proc = subprocess.Popen(argv, creationflags=_CREATE_SUSPENDED | _CREATE_NO_WINDOW, **popen_kwargs)
+    handle = _kernel32.OpenProcess(_PROCESS_SET_INFORMATION | _PROCESS_SUSPEND_RESUME, False, proc.pid)
+    try:
+        if not handle or not _kernel32.SetProcessAffinityMask(handle, affinity_mask):
+            error = ctypes.WinError(ctypes.get_last_error())
+            proc.kill()
+            proc.wait()
+            raise error
+        status = _ntdll.NtResumeProcess(handle)
+        if status:
+            # A process left suspended would make communicate() wait forever
+            proc.kill()
+            proc.wait()
+            raise OSError(f"NtResumeProcess failed (NTSTATUS 0x{status & 0xFFFFFFFF:08X})")
+    finally:
+        if handle:
+            _kernel32.CloseHandle(handle)
+    return proc
+
+
+def _clear_directory(path: str) -> None:
+    """Remove everything inside a directory, keeping the directory itself."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+
+
+def _create_sandbox_dir(worker_id: int, kind: str = 'config') -> str:
+    """
+    Create an empty darktable config (or cache) directory for a worker.
+    
+    The directory is reused for all of the worker's jobs. darktable-cli keeps
+    its library in memory, so only the generated darktablerc/data.db persist,
+    and reusing them saves darktable's first-run setup on every later job.
+    """
+    sandbox_dir = os.path.join(SANDBOX_ROOT, f"dt_worker_{worker_id}_{kind}")
+    os.makedirs(sandbox_dir, exist_ok=True)
+    _clear_directory(sandbox_dir)  # leftovers from an interrupted run
+    return sandbox_dir
 
 
 def generate_worker_profiles(max_workers: int, max_gpu: int, job_count: int) -> List[dict]:
@@ -82,8 +181,10 @@ def generate_worker_profiles(max_workers: int, max_gpu: int, job_count: int) ->
             'type': 'gpu',
             'start_thread': start,
             'end_thread': current_end,
-            'hex_mask': get_affinity_mask(start, current_end),
-            'use_gpu': True
+            'affinity_mask': get_affinity_mask(start, current_end),
+            'use_gpu': True,
+            'config_dir': _create_sandbox_dir(worker_id),
+            'cache_dir': _create_sandbox_dir(worker_id, 'cache') if config.sandbox_cachedir else None,
         })
         current_end = start - 1
         worker_id += 1
@@ -104,8 +205,10 @@ def generate_worker_profiles(max_workers: int, max_gpu: int, job_count: int) ->
             'type': 'cpu',
             'start_thread': start,
             'end_thread': current_end,
-            'hex_mask': get_affinity_mask(start, current_end),
-            'use_gpu': False
+            'affinity_mask': get_affinity_mask(start, current_end),
+            'use_gpu': False,
+            'config_dir': _create_sandbox_dir(worker_id),
+            'cache_dir': _create_sandbox_dir(worker_id, 'cache') if config.sandbox_cachedir else None,
         })
         current_end = start - 1
         worker_id += 1
@@ -128,15 +231,53 @@ class SandboxExecutor:
         
         # Darktable settings
         self.darktable_cli = config.darktable_cli
+        self._darktable_cli_str = os.fspath(self.darktable_cli)
         self.width = config.default_width
         self.height = config.default_height
         self.jpeg_quality = config.jpeg_quality
         
+        # Options shared by every job; everything after --core goes to darktable itself
+        self._argv_options = (
+            '--width', str(self.width),
+            '--height', str(self.height),
+            '--core',
+            '--conf', f'plugins/imageio/format/jpeg/quality={self.jpeg_quality}',
+        )
+        
         self._lock = threading.Lock()
         
         self.profiles = []
         self.profile_queue = queue.Queue()
+        
+        # Every sandbox directory created by any run (profiles are replaced
+        # on each execute_jobs call, e.g. for retries with fewer workers)
+        self._sandbox_dirs: Set[str] = set()
+        atexit.register(self._remove_sandboxes)
+    
+    def _remove_sandboxes(self) -> None:
+        """Delete all sandbox directories created by this executor."""
+        for sandbox_dir in self._sandbox_dirs:
+            shutil.rmtree(sandbox_dir, ignore_errors=True)
             
+    def _prepare_profile(self, profile: dict) -> None:
+        """Store the darktable-cli options that only depend on the profile."""
+        cachedir = ('--cachedir', profile['cache_dir']) if profile['cache_dir'] else ()
+        profile['argv_options'] = (
+            *self._argv_options,
+            '--configdir', profile['config_dir'],
+            *cachedir,
+            '--conf', f'opencl={"TRUE" if profile["use_gpu"] else "FALSE"}',
+        )
+    
+    def _build_argv(self, job: dict, profile: dict) -> List[str]:
+        """Build the darktable-cli argument list for a job (no shell quoting needed)."""
+        return [
+            self._darktable_cli_str,
+            job['input_folder_fwd'],
+            job['output_template'],
+            *profile['argv_options'],
+        ]
+    
     def _run_conversion(self, job: dict, profile: dict) -> dict:
         """
         Run darktable-cli for a single folder using a worker profile.
@@ -148,67 +289,47 @@ class SandboxExecutor:
             'error': None,
         }
         
-        worker_id = profile['worker_id']
-        hex_mask = profile['hex_mask']
-        use_gpu = profile['use_gpu']
-        
-        config_dir = f"C:/temp/dt_worker_{worker_id}_config"
-        os.makedirs(config_dir, exist_ok=True)
-        
-        input_folder = to_forward_slashes(job['input_folder'])
-        output_template = job['output_template']
-        if output_template.startswith("'") and output_template.endswith("'"):
-            output_template = output_template[1:-1]
-            
-        exe_path = str(self.darktable_cli)
-        
-        cmd_str = (
-            f'start "DT" /affinity {hex_mask} /b /wait "{exe_path}" '
-            f'"{input_folder}" '
-            f'"{output_template}" '
-            f'--width {self.width} '
-            f'--height {self.height} '
-            f'--core '
-            f'--configdir "{config_dir}" '
-            f'--conf plugins/imageio/format/jpeg/quality={self.jpeg_quality} '
-            f'--conf opencl={"TRUE" if use_gpu else "FALSE"}'
-        )
-        
-        if self.quiet:
-            cmd_str += ' > NUL 2>&1'
-        
         try:
-            proc = subprocess.run(
-                cmd_str,
-                capture_output=True,
-                text=True,
-                check=False,
-                shell=True
+            # stdout is never captured: it goes to the console, or nowhere in
+            # quiet mode. Only stderr is piped, for failure reporting, and kept
+            # as raw bytes so successful runs never pay for decoding it.
+            proc = _spawn_pinned(
+                self._build_argv(job, profile),
+                profile['affinity_mask'],
+                stdout=subprocess.DEVNULL if self.quiet else None,
+                stderr=subprocess.PIPE,
             )
+            _, stderr_bytes = proc.communicate()
             
             if proc.returncode == 0:
                 result['success'] = True
             else:
-                result['error'] = proc.stderr or f"Exit code: {proc.returncode}"
-                result['failed_files'] = self._extract_failed_files(proc.stderr)
+                stderr = stderr_bytes.decode('utf-8', errors='replace')
+                result['error'] = stderr or f"Exit code: {proc.returncode}"
+                result['failed_files'] = self._extract_failed_files(stderr)
                 
         except Exception as e:
             result['error'] = str(e)
-            
-        finally:
-            shutil.rmtree(config_dir, ignore_errors=True)
         
         return result
 
-    def _extract_failed_files(self, stderr: str) -> List[str]:
+    def _extract_failed_files(self, stderr: Optional[str]) -> List[str]:
         if not stderr:
             return []
-        files = []
-        for line in stderr.split('\n'):
-            match = re.search(r'([A-Za-z]:[^\s]+\.(arw|cr2|cr3|nef|dng))', line, re.IGNORECASE)
-            if match:
-                files.append(match.group(1))
-        return files
+        # dict.fromkeys drops repeated mentions while keeping first-seen order
+        return list(dict.fromkeys(match.group(1) for match in _FAILED_FILE_RE.finditer(stderr)))
+
+    def _fail_all(self, jobs: List[dict], results: dict, error: str) -> None:
+        """Mark every job as failed when none of them can be run."""
+        for job in jobs:
+            results['failed'] += 1
+            results['failed_jobs'].append(job)
+            results['results'].append({
+                'success': False,
+                'folder': str(job['input_folder']),
+                'failed_files': [],
+                'error': error,
+            })
 
     def execute_jobs(
         self,
@@ -228,102 +349,126 @@ class SandboxExecutor:
             'failed_jobs': [],
             'results': [],
             'files_completed': 0,
+            'interrupted': False,
         }
         
         if not jobs:
             return results
-            
+        
+        # Largest folders first (LPT scheduling): big folders start on the
+        # first free workers and the small ones fill in the tail.
+        jobs = sorted(jobs, key=lambda job: job.get('file_count', 0), reverse=True)
+        
         # Dynamically allocate profiles matched to actual job footprint
-        self.profiles = generate_worker_profiles(self.max_workers, self.gpu_instances, len(jobs))
+        try:
+            self.profiles = generate_worker_profiles(self.max_workers, self.gpu_instances, len(jobs))
+        except OSError as e:
+            # e.g. RAW2JPEG_SANDBOX_ROOT points below a file or a read-only path
+            print(f"❌ Cannot create worker sandboxes under {SANDBOX_ROOT}: {e}")
+            self._fail_all(jobs, results, f"Cannot create worker sandbox: {e}")
+            return results
         # Clear existing queue and populate with new profiles
         while not self.profile_queue.empty():
             self.profile_queue.get_nowait()
         for p in self.profiles:
+            self._sandbox_dirs.add(p['config_dir'])
+            if p['cache_dir']:
+                self._sandbox_dirs.add(p['cache_dir'])
+            self._prepare_profile(p)
             self.profile_queue.put(p)
             
         # Ensure we don't try to use more threads than we have profiles for
         active_thread_count = len(self.profiles)
         if active_thread_count == 0:
             print("⚠️  No worker profiles could be generated (possibly due to thread constraints).")
-            # Mark all jobs as failed if we can't run them
-            for job in jobs:
-                results['failed'] += 1
-                results['failed_jobs'].append({
-                    'input_folder': job['input_folder'],
-                    'error': "No worker profiles available.",
-                    'success': False,
-                    'failed_files': [],
-                })
+            self._fail_all(jobs, results, "No worker profiles available.")
             return results
             
         original_sigint = signal.signal(signal.SIGINT, _signal_handler)
         
         try:
-            pbar = tqdm(total=total_files, desc="Converting", unit="file")
+            # disable=None turns the bar off when stderr is not a terminal
+            pbar = tqdm(total=total_files, desc="Converting", unit="file", disable=None)
+            
+            # The pool has exactly one thread per profile, and each thread takes
+            # its profile once at startup and keeps it for its whole lifetime.
+            worker_state = threading.local()
             
-            with ThreadPoolExecutor(max_workers=active_thread_count) as executor:
+            def bind_profile():
+                worker_state.profile = self.profile_queue.get_nowait()
+            
+            with ThreadPoolExecutor(max_workers=active_thread_count, initializer=bind_profile) as executor:
+                
+                def shutdown_result(job):
+                    return {
+                        'success': False,
+                        'folder': str(job['input_folder']),
+                        'failed_files': [],
+                        'error': "Shutdown requested",
+                    }
                 
                 def task_wrapper(job):
-                    profile = self.profile_queue.get()
-                    try:
-                        if _shutdown_requested:
-                            return {
-                                'success': False,
-                                'folder': str(job['input_folder']),
-                                'failed_files': [],
-                                'error': "Shutdown requested",
-                            }
-                        return self._run_conversion(job, profile)
-                    finally:
-                        self.profile_queue.put(profile)
-
-                future_to_job = {executor.submit(task_wrapper, job): job for job in jobs}
+                    if _shutdown_requested:
+                        return job, shutdown_result(job), False
+                    # _run_conversion reports its own errors, so tasks don't raise
+                    return job, self._run_conversion(job, worker_state.profile), True
                 
-                for future in as_completed(future_to_job):
-                    job = future_to_job[future]
-                    job_file_count = job.get('file_count', 0)
-                    
-                    try:
-                        result = future.result()
-                    except Exception as e:
-                        result = {
-                            'success': False,
-                            'folder': str(job['input_folder']),
-                            'failed_files': [],
-                            'error': str(e),
-                        }
-                    
+                def record(job, result, ran=True):
+                    # Jobs that never ran leave files_completed and the bar alone
+                    nonlocal files_completed
+                    job_file_count = job.get('file_count', 0) if ran else 0
                     results['results'].append(result)
-                    
-                    pbar.update(job_file_count)
                     files_completed += job_file_count
                     
                     if result['success']:
                         results['completed'] += 1
-                        pbar.set_description(f"✓ {job['input_folder'].name[:25]}")
+                        status = '✓'
                     else:
                         results['failed'] += 1
                         results['failed_jobs'].append(job)
-                        pbar.set_description(f"✗ {job['input_folder'].name[:25]}")
+                        status = '✗'
                     
-                    pbar.set_postfix({
-                        'folders': f"{results['completed']}/{len(jobs)}",
-                        'fail': results['failed'],
-                    })
+                    if not pbar.disable:
+                        # Only stage the new text here; update() redraws the bar
+                        # once, subject to tqdm's own refresh interval.
+                        pbar.set_description(f"{status} {job['input_folder'].name[:25]}", refresh=False)
+                        pbar.set_postfix_str(
+                            f"folders={results['completed']}/{len(jobs)}, fail={results['failed']}",
+                            refresh=False,
+                        )
+                        pbar.update(job_file_count)
                     
                     if progress_callback:
                         progress_callback(result)
-                        
-                    if _shutdown_requested:
-                        for f in future_to_job:
-                            f.cancel()
+
+                # Only one job per worker is handed to the pool at a time; the
+                # rest wait in `pending`, so a shutdown simply stops submitting.
+                pending = deque(jobs)
+                active = set()
+                
+                while pending or active:
+                    while pending and len(active) < active_thread_count and not _shutdown_requested:
+                        active.add(executor.submit(task_wrapper, pending.popleft()))
+                    
+                    if not active:
                         break
-                        
+                    
+                    done, active = wait(active, return_when=FIRST_COMPLETED)
+                    
+                    for future in done:
+                        record(*future.result())
+                
+                # Jobs never started because of a shutdown still count as failed,
+                # so an interrupted run is not reported as a clean one
+                for job in pending:
+                    record(job, shutdown_result(job), ran=False)
+                
         finally:
             pbar.close()
             signal.signal(signal.SIGINT, original_sigint)
         
         results['files_completed'] = files_completed
+        results['interrupted'] = _shutdown_requested
         return results
 
     def retry_failed_jobs(
@@ -342,7 +487,8 @@ class SandboxExecutor:
         }
         
         for attempt in range(1, max_retries + 1):
-            if not remaining:
+            # A Ctrl+C during the previous run also cancels the retries
+            if not remaining or _shutdown_requested:
                 break
             
             print(f"\n🔄 Retry attempt {attempt}/{max_retries} for {len(remaining)} failed jobs...")
@@ -1,87 +1,87 @@
 # Job Planner module
 """Discover leaf folders for batch conversion."""
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from .utils import detect_folder_pattern, to_forward_slashes, get_output_template
+from .utils import (
+    RAW_SUFFIXES,
+    detect_filename_pattern,
+    get_output_template,
+    to_forward_slashes,
+)
 
 
-# RAW file extensions
-RAW_EXTENSIONS = {'.arw', '.cr2', '.cr3', '.nef', '.dng', '.orf', '.rw2', '.raf', '.pef'}
-
-
-def is_leaf_folder(folder: Path) -> bool:
+def _scan_directory(folder: Path) -> Tuple[int, str, List[Path]]:
     """
-    Check if folder is a leaf folder (contains RAW files, no subdirectories with RAW files).
-    
-    A leaf folder contains at least one RAW file directly.
+    Scan a folder once: count its RAW files, detect their filename pattern
+    from the first one, and list its subdirectories.
     """
-    has_raw_files = False
-    
-    for item in folder.iterdir():
-        if item.is_file() and item.suffix.lower() in RAW_EXTENSIONS:
-            has_raw_files = True
-            break
-    
-    return has_raw_files
+    raw_count = 0
+    pattern = 'unknown'
+    subdirs = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(Path(entry.path))
+            elif entry.name.lower().endswith(RAW_SUFFIXES):
+                if not raw_count:
+                    pattern = detect_filename_pattern(entry.name)
+                raw_count += 1
+    return raw_count, pattern, subdirs
 
 
-def discover_leaf_folders(inpath: Path, outpath: Optional[Path] = None) -> List[Path]:
+def discover_leaf_folders(inpath: Path, outpath: Optional[Path] = None) -> List[Tuple[Path, int, str]]:
     """
     Recursively discover all leaf folders containing RAW files.
     
     Excludes the output directory if it's inside the input directory.
+    Every directory is scanned once: the same pass counts its RAW files,
+    detects their filename pattern and collects its subdirectories, so
+    planning needs no further directory I/O.
     
     Args:
         inpath: Input directory to search
         outpath: Output directory to exclude (optional)
     
     Returns:
-        List of leaf folder paths
+        Sorted list of (leaf folder path, RAW file count, filename pattern) tuples
     """
-    if not inpath.exists() or not inpath.is_dir():
+    if not inpath.is_dir():
         raise ValueError(f"Input path does not exist or is not a directory: {inpath}")
     
+    # Output directory as a normalized prefix ending in a separator, so that
+    # it and everything below it can be skipped with a string comparison
+    outpath_prefix = os.path.join(os.path.normcase(os.path.abspath(outpath)), '') if outpath else None
+    
+    def is_output(folder: Path) -> bool:
+        if outpath_prefix is None:
+            return False
+        return os.path.join(os.path.normcase(os.path.abspath(folder)), '').startswith(outpath_prefix)
+    
     leaf_folders = []
     
-    # Use a stack for iterative traversal
-    stack = [inpath]
+    # Walk the tree one level at a time. Directory listing is I/O bound and
+    # releases the GIL, so sibling directories are scanned concurrently.
+    level = [] if is_output(inpath) else [inpath]
     
-    while stack:
-        current = stack.pop()
-        
-        # Skip output directory
-        if outpath:
-            try:
-                current.relative_to(outpath)
-                continue  # This folder is inside output dir, skip it
-            except ValueError:
-                pass  # Not inside output dir, continue processing
-        
-        # Check if current folder is a leaf folder
-        if is_leaf_folder(current):
-            leaf_folders.append(current)
-        
-        # Add subdirectories to stack
-        for item in current.iterdir():
-            if item.is_dir():
-                stack.append(item)
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+        while level:
+            next_level = []
+            for folder, (raw_count, pattern, subdirs) in zip(level, pool.map(_scan_directory, level)):
+                # A leaf folder contains at least one RAW file directly
+                if raw_count:
+                    leaf_folders.append((folder, raw_count, pattern))
+                next_level.extend(subdir for subdir in subdirs if not is_output(subdir))
+            level = next_level
     
     return sorted(leaf_folders)
 
 
-def count_raw_files(folder: Path) -> int:
-    """Count the number of RAW files in a folder."""
-    count = 0
-    for item in folder.iterdir():
-        if item.is_file() and item.suffix.lower() in RAW_EXTENSIONS:
-            count += 1
-    return count
-
-
 def create_conversion_jobs(
-    leaf_folders: List[Path],
+    leaf_folders: List[Tuple[Path, int, str]],
     inpath: Path,
     outpath: Path,
 ) -> tuple[List[dict], dict[Path, int], int]:
@@ -89,13 +89,14 @@ def create_conversion_jobs(
     Create conversion job definitions for each leaf folder.
     
     Args:
-        leaf_folders: List of leaf folder paths
+        leaf_folders: (folder path, RAW file count, pattern) tuples from discover_leaf_folders
         inpath: Base input directory
         outpath: Base output directory
     
     Returns:
         Tuple of:
-            - List of job dicts with 'input_folder', 'output_template', 'pattern', 'file_count'
+            - List of job dicts with 'input_folder', 'input_folder_fwd', 'output_template',
+              'pattern', 'file_count'
             - Dict mapping folder path to file count
             - Total file count across all folders
     """
@@ -103,17 +104,21 @@ def create_conversion_jobs(
     file_counts = {}
     total_files = 0
     outpath_str = to_forward_slashes(outpath)
-    
-    for folder in leaf_folders:
-        pattern = detect_folder_pattern(folder)
-        output_template = get_output_template(pattern, outpath_str)
-        file_count = count_raw_files(folder)
+    # The template only depends on the pattern for a given batch, so it is
+    # built once per pattern rather than once per folder
+    templates = {}
+    
+    for folder, file_count, pattern in leaf_folders:
+        output_template = templates.get(pattern)
+        if output_template is None:
+            output_template = templates[pattern] = get_output_template(pattern, outpath_str)
         
         file_counts[folder] = file_count
         total_files += file_count
         
         jobs.append({
             'input_folder': folder,
+            'input_folder_fwd': to_forward_slashes(folder),
             'output_template': output_template,
             'pattern': pattern,
             'file_count': file_count,
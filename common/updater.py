@@ -1,16 +1,36 @@
 # Update Monitor module
 """Monitor darktable releases and notify user of updates."""
 
+import hashlib
 import json
-from datetime import datetime, timedelta
+import os
+import threading
+import time
+from datetime import datetime
+from itertools import zip_longest
 from pathlib import Path
 from typing import Optional
 
-import requests
-
 from .capability import get_darktable_version
 from .config import get_config
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib json module
+    orjson = None
+
+
+# Top-level keys of the GitHub release JSON that get_latest_release uses
+RELEASE_FIELDS = frozenset({'tag_name', 'html_url', 'published_at'})
+
+# Environment variable that turns off all update checks (e.g. for CI runs)
+NO_UPDATE_CHECK_ENV = 'RAW2JPEG_NO_UPDATE_CHECK'
+
+
+def update_check_disabled() -> bool:
+    """Check whether update checks are turned off through the environment."""
+    return os.environ.get(NO_UPDATE_CHECK_ENV, '') not in ('', '0')
+
 
 class UpdateMonitor:
     """Monitor darktable releases from GitHub."""
@@ -21,37 +41,80 @@ class UpdateMonitor:
     def __init__(self):
         self._config = get_config()
         self._cache: dict = {}
-        self._load_cache()
+        self._saved_digest: Optional[bytes] = None
+        self._disabled = update_check_disabled()
+        if not self._disabled:
+            self._load_cache()
+        self._session = None
+        self._async_result: Optional[dict] = None
+        self._async_done = threading.Event()
     
     def _load_cache(self) -> None:
         """Load cached update info."""
         if self.CACHE_FILE.exists():
             try:
-                with open(self.CACHE_FILE, 'r') as f:
-                    self._cache = json.load(f)
+                payload = self.CACHE_FILE.read_bytes()
+                self._cache = orjson.loads(payload) if orjson else json.loads(payload)
+                self._saved_digest = self._digest(payload)
             except (json.JSONDecodeError, IOError):
                 self._cache = {}
     
     def _save_cache(self) -> None:
-        """Save update cache."""
+        """
+        Save update cache.
+        
+        Nothing is written if the content matches what is already on disk.
+        Otherwise the cache is written to a temp file and moved into place,
+        so an interrupted write never leaves a truncated cache behind.
+        """
+        payload = self._serialize_cache()
+        digest = self._digest(payload)
+        if digest == self._saved_digest:
+            return
+        
+        tmp_file = self.CACHE_FILE.with_suffix('.tmp')
         try:
-            with open(self.CACHE_FILE, 'w') as f:
-                json.dump(self._cache, f)
+            tmp_file.write_bytes(payload)
+            os.replace(tmp_file, self.CACHE_FILE)
         except IOError:
-            pass
+            return
+        self._saved_digest = digest
+    
+    def _serialize_cache(self) -> bytes:
+        if orjson:
+            return orjson.dumps(self._cache, option=orjson.OPT_SORT_KEYS)
+        return json.dumps(self._cache, sort_keys=True).encode()
     
-    def _is_cache_valid(self) -> bool:
-        """Check if cache is still valid."""
+    @staticmethod
+    def _digest(payload: bytes) -> bytes:
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
+    def _cache_age(self) -> Optional[float]:
+        """Seconds since the cached release was last checked, or None if unknown."""
         last_check = self._cache.get('last_check')
-        if not last_check:
-            return False
-        
-        try:
-            last_dt = datetime.fromisoformat(last_check)
-            cache_days = self._config.cache_days
-            return datetime.now() - last_dt < timedelta(days=cache_days)
-        except ValueError:
+        if isinstance(last_check, str):
+            # Caches written by older versions store an ISO timestamp;
+            # convert it once, the next save writes it back as epoch seconds
+            try:
+                last_check = datetime.fromisoformat(last_check).timestamp()
+            except ValueError:
+                return None
+            self._cache['last_check'] = last_check
+        if not isinstance(last_check, (int, float)):
+            return None
+        return time.time() - last_check
+    
+    def _is_cache_fresh(self) -> bool:
+        """Check if the cache can be used without asking GitHub."""
+        age = self._cache_age()
+        return age is not None and age < self._config.soft_ttl_days * 86400
+    
+    def _is_cache_revalidatable(self) -> bool:
+        """Check if a stale cache can be revalidated with a conditional request."""
+        if not (self._cache.get('etag') or self._cache.get('last_modified')):
             return False
+        age = self._cache_age()
+        return age is not None and age < self._config.cache_days * 86400
     
     def get_latest_release(self, force_refresh: bool = False) -> Optional[dict]:
         """
@@ -63,49 +126,123 @@ class UpdateMonitor:
         Returns:
             dict with 'version', 'url', 'published' or None
         """
-        # Use cache if valid
-        if not force_refresh and self._is_cache_valid():
-            return {
-                'version': self._cache.get('latest_version'),
-                'url': self._cache.get('release_url'),
-                'published': self._cache.get('published'),
-            }
+        if self._disabled:
+            return None
+        
+        # Use cache if fresh
+        if not force_refresh and self._is_cache_fresh():
+            return self._cached_release()
+        
+        # Imported here so that runs served from the cache never load requests
+        import requests
+        
+        headers = {}
+        # Conditional request: GitHub answers 304 without a body (and without
+        # using up rate limit) when the latest release hasn't changed. Past
+        # cache_days the cache is refetched in full.
+        if not force_refresh and self._is_cache_revalidatable():
+            if self._cache.get('etag'):
+                headers['If-None-Match'] = self._cache['etag']
+            if self._cache.get('last_modified'):
+                headers['If-Modified-Since'] = self._cache['last_modified']
         
         try:
             api_url = f"https://api.github.com/repos/{self.GITHUB_REPO}/releases/latest"
-            response = requests.get(
-                api_url,
-                headers={'Accept': 'application/vnd.github.v3+json'},
-                timeout=10,
-            )
-            response.raise_for_status()
-            
-            data = response.json()
+            session = self._get_session()
+            with session.get(api_url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304:
+                    self._cache['last_check'] = time.time()
+                    self._save_cache()
+                    return self._cached_release()
+                
+                response.raise_for_status()
+                
+                data = self._read_release_fields(response)
             
             # Extract version from tag (e.g., "release-5.4.0" -> "5.4.0")
             tag = data.get('tag_name', '')
             version = tag.replace('release-', '').lstrip('v')
             
-            result = {
-                'version': version,
-                'url': data.get('html_url'),
-                'published': data.get('published_at'),
-            }
-            
             # Update cache
             self._cache = {
-                'last_check': datetime.now().isoformat(),
+                'last_check': time.time(),
                 'latest_version': version,
                 'release_url': data.get('html_url'),
                 'published': data.get('published_at'),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
             }
             self._save_cache()
             
-            return result
+            return self._cached_release()
             
-        except (requests.RequestException, json.JSONDecodeError, KeyError):
+        except (requests.RequestException, ValueError, KeyError):
             return None
     
+    @staticmethod
+    def _read_release_fields(response) -> dict:
+        """
+        Read the release fields we use from a streamed API response.
+        
+        The release JSON carries the full notes and asset list, but only three
+        top-level keys are needed. With ijson installed those are picked out
+        of the stream and the rest is never downloaded or parsed; without it
+        the whole body is decoded as usual.
+        
+        Raises:
+            ValueError: if the body is not valid JSON or could not be read
+        """
+        try:
+            import ijson
+        except ImportError:
+            return response.json()
+        from urllib3.exceptions import HTTPError as Urllib3Error
+        
+        response.raw.decode_content = True  # let urllib3 undo gzip
+        data = {}
+        try:
+            for key, value in ijson.kvitems(response.raw, ''):
+                if key in RELEASE_FIELDS:
+                    data[key] = value
+                    if len(data) == len(RELEASE_FIELDS):
+                        break
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid release JSON: {e}") from e
+        except (Urllib3Error, OSError) as e:
+            # Reading response.raw directly bypasses requests' own wrapping of
+            # connection resets and read timeouts
+            raise ValueError(f"Failed to read release JSON: {e}") from e
+        return data
+    
+    def _get_session(self):
+        """
+        Get the HTTP session, creating it on first use.
+        
+        The session keeps the connection to api.github.com alive between
+        requests and retries transient server errors with backoff.
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            self._session = requests.Session()
+            self._session.headers.update({
+                'Accept': 'application/vnd.github.v3+json',
+                'User-Agent': 'raw2jpeg-updater',
+            })
+            retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+            self._session.mount('https://', HTTPAdapter(max_retries=retry))
+        return self._session
+    
+    def _cached_release(self) -> dict:
+        """Build the release info dict from the cache."""
+        return {
+            'version': self._cache.get('latest_version'),
+            'url': self._cache.get('release_url'),
+            'published': self._cache.get('published'),
+        }
+    
     def check_for_updates(self) -> Optional[dict]:
         """
         Check if an update is available.
@@ -113,6 +250,9 @@ class UpdateMonitor:
         Returns:
             dict with 'update_available', 'current', 'latest', 'url' or None on error
         """
+        if self._disabled:
+            return None
+        
         current = get_darktable_version()
         if not current:
             return None
@@ -124,12 +264,43 @@ class UpdateMonitor:
         latest = latest_info['version']
         
         return {
-            'update_available': self._compare_versions(current, latest) < 0,
+            'update_available': current != latest and self._compare_versions(current, latest) < 0,
             'current': current,
             'latest': latest,
             'url': latest_info.get('url'),
         }
     
+    def start_async(self) -> threading.Thread:
+        """
+        Run check_for_updates in a background daemon thread.
+        
+        The result is picked up later with async_result(), so the network
+        request overlaps with the conversion instead of delaying it.
+        """
+        def run():
+            try:
+                self._async_result = self.check_for_updates()
+            except Exception:
+                pass  # Don't fail on update check errors
+            finally:
+                self._async_done.set()
+        
+        thread = threading.Thread(target=run, name='update-check', daemon=True)
+        thread.start()
+        return thread
+    
+    def async_result(self, timeout: float = 0.1) -> Optional[dict]:
+        """
+        Get the result of start_async.
+        
+        Returns:
+            The check_for_updates result, or None if the check failed or
+            hasn't finished within timeout seconds
+        """
+        if self._async_done.wait(timeout):
+            return self._async_result
+        return None
+    
     @staticmethod
     def _compare_versions(v1: str, v2: str) -> int:
         """
@@ -138,22 +309,16 @@ class UpdateMonitor:
         Returns:
             -1 if v1 < v2, 0 if equal, 1 if v1 > v2
         """
-        def parse(v):
-            return [int(x) for x in v.split('.') if x.isdigit()]
-        
-        p1, p2 = parse(v1), parse(v2)
+        if v1 == v2:
+            return 0
         
-        # Pad to same length
-        while len(p1) < len(p2):
-            p1.append(0)
-        while len(p2) < len(p1):
-            p2.append(0)
+        def parse(v):
+            return (int(x) for x in v.split('.') if x.isdigit())
         
-        for a, b in zip(p1, p2):
-            if a < b:
-                return -1
-            if a > b:
-                return 1
+        # The shorter version is padded with zeros (5.4 == 5.4.0)
+        for a, b in zip_longest(parse(v1), parse(v2), fillvalue=0):
+            if a != b:
+                return -1 if a < b else 1
         return 0
 
 
@@ -1,11 +1,19 @@
 # Utility functions
 """Helpers for filename pattern detection and output path generation."""
 
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 
 
+# RAW file extensions
+RAW_EXTENSIONS = frozenset({'.arw', '.cr2', '.cr3', '.nef', '.dng', '.orf', '.rw2', '.raf', '.pef'})
+
+# Same extensions as a tuple, for str.endswith()
+RAW_SUFFIXES = tuple(RAW_EXTENSIONS)
+
 # Filename patterns
 # Pattern 1: yyyy-mm-dd_hh-mm-ss_DSC#####.ext (datetime prefix)
 DATETIME_PREFIX_PATTERN = re.compile(
@@ -22,6 +30,20 @@ DATETIME_SUFFIX_PATTERN = re.compile(
     r'^([A-Za-z]+\d+)_(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})\.(\w+)$'
 )
 
+# All three patterns as one regex, tried in the same order as above; the
+# named group that matched tells which pattern it was
+_COMBINED_PATTERN = re.compile(
+    r'^(?:(?P<pre>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}_[A-Za-z]+\d+)'
+    r'|(?P<suf>[A-Za-z]+\d+_\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})'
+    r'|(?P<plain>[A-Za-z]+\d+))\.\w+$'
+)
+
+_PATTERN_NAMES = {
+    'pre': 'datetime_prefix',
+    'suf': 'datetime_suffix',
+    'plain': 'plain_dsc',
+}
+
 
 def detect_filename_pattern(filename: str) -> str:
     """
@@ -33,19 +55,29 @@ def detect_filename_pattern(filename: str) -> str:
         'plain_dsc' - DSC07514.ARW
         'unknown' - unrecognized pattern
     """
-    if DATETIME_PREFIX_PATTERN.match(filename):
-        return 'datetime_prefix'
-    elif DATETIME_SUFFIX_PATTERN.match(filename):
-        return 'datetime_suffix'
-    elif PLAIN_DSC_PATTERN.match(filename):
-        return 'plain_dsc'
-    return 'unknown'
+    # Fast path for plain names (DSC07514.ARW), the most common case and the
+    # one the regex tries last. Only ASCII is handled here so the result
+    # always agrees with the regex; everything else falls through to it.
+    stem, dot, ext = filename.rpartition('.')
+    if dot and ext.isalnum() and filename.isascii():
+        letters = stem.rstrip('0123456789')
+        if len(letters) < len(stem) and letters.isalpha():
+            return 'plain_dsc'
+    
+    match = _COMBINED_PATTERN.match(filename)
+    if match is None:
+        return 'unknown'
+    return _PATTERN_NAMES[match.lastgroup]
 
 
+@lru_cache(maxsize=32)
 def get_output_template(pattern: str, base_outpath: str) -> str:
     """
     Generate the darktable output path template based on filename pattern.
     
+    The result only depends on the arguments, so callers compute it once per
+    batch and pattern (results are also memoized here).
+    
     Args:
         pattern: One of 'datetime_prefix', 'datetime_suffix', 'plain_dsc', 'unknown'
         base_outpath: Base output directory (with forward slashes)
@@ -58,18 +90,18 @@ def get_output_template(pattern: str, base_outpath: str) -> str:
     
     if pattern == 'datetime_prefix':
         # Already has datetime in name, just use date subfolder
-        return f"'{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(FILE.NAME).jpg'"
+        return f"{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(FILE.NAME).jpg"
     
     elif pattern == 'datetime_suffix':
         # Already has datetime in name, just use date subfolder
-        return f"'{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(FILE.NAME).jpg'"
+        return f"{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(FILE.NAME).jpg"
     
     elif pattern == 'plain_dsc':
         # Need to add datetime prefix to filename
-        return f"'{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)_$(EXIF.HOUR)-$(EXIF.MINUTE)-$(EXIF.SECOND)_$(FILE.NAME).jpg'"
+        return f"{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)_$(EXIF.HOUR)-$(EXIF.MINUTE)-$(EXIF.SECOND)_$(FILE.NAME).jpg"
     
     else:  # unknown - treat like plain_dsc
-        return f"'{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)_$(EXIF.HOUR)-$(EXIF.MINUTE)-$(EXIF.SECOND)_$(FILE.NAME).jpg'"
+        return f"{base}/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)/$(EXIF.YEAR)-$(EXIF.MONTH)-$(EXIF.DAY)_$(EXIF.HOUR)-$(EXIF.MINUTE)-$(EXIF.SECOND)_$(FILE.NAME).jpg"
 
 
 def to_forward_slashes(path: Path) -> str:
@@ -84,11 +116,11 @@ def get_sample_file(folder: Path) -> Optional[Path]:
     Returns:
         Path to first RAW file found, or None
     """
-    raw_extensions = {'.arw', '.cr2', '.cr3', '.nef', '.dng', '.orf', '.rw2', '.raf', '.pef'}
-    
-    for f in folder.iterdir():
-        if f.is_file() and f.suffix.lower() in raw_extensions:
-            return f
+    with os.scandir(folder) as it:
+        for entry in it:
+            # DirEntry.is_file() uses the type cached by scandir, no extra stat
+            if entry.name.lower().endswith(RAW_SUFFIXES) and entry.is_file():
+                return Path(entry.path)
     return None
 
 
@@ -0,0 +1,7 @@
+# Shared pytest configuration
+"""Make the project root importable for the test modules."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
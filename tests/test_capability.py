@@ -0,0 +1,59 @@
+# Unit tests for capability module
+"""Tests for darktable version detection."""
+
+import subprocess
+
+import pytest
+
+from common import capability
+from common.capability import get_darktable_version
+
+
+def version_output(stdout, stderr=''):
+    """Build a fake darktable-cli --version result."""
+    return subprocess.CompletedProcess(['darktable-cli', '--version'], 0, stdout=stdout, stderr=stderr)
+
+
+class TestGetDarktableVersion:
+    """Tests for get_darktable_version function."""
+
+    def setup_method(self):
+        get_darktable_version.cache_clear()
+
+    def teardown_method(self):
+        get_darktable_version.cache_clear()
+
+    def test_named_version(self, monkeypatch):
+        """Test parsing of the 'darktable-cli X.Y.Z' banner."""
+        output = version_output("this is darktable-cli 5.4.0\nCopyright (C) 2012-2025")
+        monkeypatch.setattr(capability.subprocess, 'run', lambda *args, **kwargs: output)
+        assert get_darktable_version() == '5.4.0'
+
+    def test_fallback_version(self, monkeypatch):
+        """Test fallback to the first X.Y.Z found in the output."""
+        output = version_output("", stderr="darktable 4.8.1+123")
+        monkeypatch.setattr(capability.subprocess, 'run', lambda *args, **kwargs: output)
+        assert get_darktable_version() == '4.8.1'
+
+    def test_no_version(self, monkeypatch):
+        """Test that unparseable output yields None."""
+        output = version_output("unexpected output")
+        monkeypatch.setattr(capability.subprocess, 'run', lambda *args, **kwargs: output)
+        assert get_darktable_version() is None
+
+    def test_subprocess_runs_once(self, monkeypatch):
+        """Test that repeated lookups reuse the cached result."""
+        calls = []
+
+        def fake_run(*args, **kwargs):
+            calls.append(args)
+            return version_output("darktable-cli 5.4.0")
+
+        monkeypatch.setattr(capability.subprocess, 'run', fake_run)
+        assert get_darktable_version() == '5.4.0'
+        assert get_darktable_version() == '5.4.0'
+        assert len(calls) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,51 @@
+# Unit tests for cli module
+"""Tests for command-line argument parsing."""
+
+import pytest
+from pathlib import Path
+
+from common.cli import parse_args
+
+
+class TestParseArgs:
+    """Tests for parse_args function."""
+
+    def test_defaults(self):
+        """Test that omitted options get their defaults."""
+        args = parse_args([])
+        assert args.inpath is None
+        assert args.outpath is None
+        assert not args.quiet and not args.yes and not args.no_update_check
+
+    def test_value_separate(self):
+        """Test the '--inpath x' form."""
+        args = parse_args(['--inpath', 'RAW', '--outpath', 'JPEG'])
+        assert args.inpath == Path('RAW')
+        assert args.outpath == Path('JPEG')
+
+    def test_value_equals(self):
+        """Test the '--inpath=x' form."""
+        args = parse_args(['--inpath=RAW', '--quiet'])
+        assert args.inpath == Path('RAW')
+        assert args.quiet
+
+    def test_yes_aliases(self):
+        """Test that -y and --yes set the same flag."""
+        assert parse_args(['-y']).yes
+        assert parse_args(['--yes']).yes
+
+    def test_missing_value_falls_back_to_argparse(self, capsys):
+        """Test that a missing value is reported by argparse."""
+        with pytest.raises(SystemExit):
+            parse_args(['--inpath'])
+        assert '--inpath' in capsys.readouterr().err
+
+    def test_unknown_option_falls_back_to_argparse(self, capsys):
+        """Test that unknown options are rejected by argparse."""
+        with pytest.raises(SystemExit):
+            parse_args(['--bogus'])
+        assert 'unrecognized arguments' in capsys.readouterr().err
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
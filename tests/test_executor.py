@@ -0,0 +1,208 @@
+# Unit tests for executor module
+"""Tests for job dispatch in the sandboxed executor."""
+
+import threading
+import time
+
+import pytest
+from pathlib import Path
+
+from common import executor
+from common.executor import SandboxExecutor
+
+
+def make_jobs(*file_counts):
+    """Build minimal job dicts, one per folder."""
+    return [
+        {'input_folder': Path(f'/photos/folder{i}'), 'file_count': count}
+        for i, count in enumerate(file_counts)
+    ]
+
+
+@pytest.fixture
+def sandbox_executor(tmp_path, monkeypatch):
+    """A SandboxExecutor with 16 CPU threads, sandboxes in tmp_path and a stubbed darktable run."""
+    monkeypatch.setattr(executor.os, 'cpu_count', lambda: 16)
+    monkeypatch.setattr(executor, 'SANDBOX_ROOT', str(tmp_path))
+    sandbox = SandboxExecutor(quiet=True)
+    sandbox.calls = []
+    sandbox.failing = set()
+
+    def fake_run(job, profile):
+        sandbox.calls.append((job, profile['worker_id'], threading.get_ident()))
+        time.sleep(0.01)
+        success = job['input_folder'] not in sandbox.failing
+        return {
+            'success': success,
+            'folder': str(job['input_folder']),
+            'failed_files': [],
+            'error': None if success else "Exit code: 1",
+        }
+
+    monkeypatch.setattr(sandbox, '_run_conversion', fake_run)
+    return sandbox
+
+
+class TestExecuteJobs:
+    """Tests for SandboxExecutor.execute_jobs method."""
+
+    def test_bounded_window(self, sandbox_executor, monkeypatch):
+        """Test that no more jobs are in flight than there are worker threads."""
+        submitted = []
+        in_flight = []
+
+        class CountingPool(executor.ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                future = super().submit(*args, **kwargs)
+                submitted.append(future)
+                in_flight.append(sum(not f.done() for f in submitted))
+                return future
+
+        monkeypatch.setattr(executor, 'ThreadPoolExecutor', CountingPool)
+        sandbox_executor.max_workers = 2
+        results = sandbox_executor.execute_jobs(make_jobs(*[10] * 9))
+
+        assert len(submitted) == 9
+        assert max(in_flight) <= 2
+        assert results['completed'] == 9
+
+    def test_largest_first(self, sandbox_executor):
+        """Test that folders are dispatched in order of decreasing size."""
+        sandbox_executor.max_workers = 1
+        sandbox_executor.execute_jobs(make_jobs(5, 200, 40, 90))
+        assert [job['file_count'] for job, _, _ in sandbox_executor.calls] == [200, 90, 40, 5]
+
+    def test_one_profile_per_thread(self, sandbox_executor):
+        """Test that each worker thread keeps a single profile of its own."""
+        sandbox_executor.execute_jobs(make_jobs(*[10] * 9))
+
+        assert len(sandbox_executor.profiles) == sandbox_executor.max_workers
+        profiles_by_thread = {}
+        for _, worker_id, thread_id in sandbox_executor.calls:
+            profiles_by_thread.setdefault(thread_id, set()).add(worker_id)
+        assert all(len(ids) == 1 for ids in profiles_by_thread.values())
+        assert len({ids.pop() for ids in profiles_by_thread.values()}) == len(profiles_by_thread)
+
+    def test_no_more_profiles_than_jobs(self, sandbox_executor):
+        """Test that a single folder gets a single worker."""
+        sandbox_executor.execute_jobs(make_jobs(10))
+        assert len(sandbox_executor.profiles) == 1
+
+    def test_result_accounting(self, sandbox_executor):
+        """Test the completed/failed counters and the failed job list."""
+        jobs = make_jobs(10, 20, 30)
+        sandbox_executor.failing = {jobs[1]['input_folder']}
+        results = sandbox_executor.execute_jobs(jobs)
+
+        assert results['completed'] == 2
+        assert results['failed'] == 1
+        assert results['failed_jobs'] == [jobs[1]]
+        assert len(results['results']) == 3
+        assert results['files_completed'] == 60
+
+    def test_shutdown_records_unstarted_jobs(self, sandbox_executor, monkeypatch):
+        """Test that jobs skipped after a shutdown request count as failed but not as done."""
+        def stop_after_first(job, profile):
+            executor._shutdown_requested = True
+            return {'success': True, 'folder': str(job['input_folder']), 'failed_files': [], 'error': None}
+
+        monkeypatch.setattr(executor, '_shutdown_requested', False)  # restored afterwards
+        monkeypatch.setattr(sandbox_executor, '_run_conversion', stop_after_first)
+        sandbox_executor.max_workers = 1
+        results = sandbox_executor.execute_jobs(make_jobs(*[10] * 5))
+
+        assert results['completed'] == 1
+        assert results['failed'] == 4
+        assert results['files_completed'] == 10
+        assert results['interrupted']
+        assert {result['error'] for result in results['results'][1:]} == {"Shutdown requested"}
+
+    def test_unusable_sandbox_root(self, sandbox_executor, monkeypatch, tmp_path):
+        """Test that a sandbox root that cannot be created fails the jobs instead of raising."""
+        (tmp_path / 'notadir').write_text('')
+        monkeypatch.setattr(executor, 'SANDBOX_ROOT', str(tmp_path / 'notadir' / 'sb'))
+        jobs = make_jobs(10, 20)
+        results = sandbox_executor.execute_jobs(jobs)
+
+        assert results['failed'] == 2
+        assert results['failed_jobs'] == [jobs[1], jobs[0]]
+        assert all(result['error'].startswith("Cannot create worker sandbox") for result in results['results'])
+        assert sandbox_executor.calls == []
+
+
+class TestBuildArgv:
+    """Tests for SandboxExecutor._prepare_profile and _build_argv methods."""
+
+    JOB = {'input_folder_fwd': 'C:/photos/day1', 'output_template': 'D:/out/$(FILE_NAME)'}
+
+    def build(self, cache_dir, use_gpu=False):
+        """Prepare a profile and return the executor with the argv it builds for JOB."""
+        sandbox = SandboxExecutor(quiet=True)
+        profile = {'config_dir': 'T:/dt_worker_1_config', 'cache_dir': cache_dir, 'use_gpu': use_gpu}
+        sandbox._prepare_profile(profile)
+        return sandbox, sandbox._build_argv(self.JOB, profile)
+
+    def test_layout_without_cachedir(self):
+        """Test positionals first, then the export options, --core and darktable's own options."""
+        sandbox, argv = self.build(None)
+        assert argv == [
+            sandbox._darktable_cli_str, 'C:/photos/day1', 'D:/out/$(FILE_NAME)',
+            '--width', str(sandbox.width), '--height', str(sandbox.height),
+            '--core',
+            '--conf', f'plugins/imageio/format/jpeg/quality={sandbox.jpeg_quality}',
+            '--configdir', 'T:/dt_worker_1_config',
+            '--conf', 'opencl=FALSE',
+        ]
+
+    def test_layout_with_cachedir(self):
+        """Test that --cachedir follows --configdir, after --core."""
+        sandbox, argv = self.build('T:/dt_worker_1_cache', use_gpu=True)
+        assert argv[-6:] == [
+            '--configdir', 'T:/dt_worker_1_config',
+            '--cachedir', 'T:/dt_worker_1_cache',
+            '--conf', 'opencl=TRUE',
+        ]
+        assert argv.index('--core') < argv.index('--cachedir')
+
+
+class TestExtractFailedFiles:
+    """Tests for SandboxExecutor._extract_failed_files method."""
+
+    def test_unique_in_order(self):
+        """Test that repeated mentions collapse and first-seen order is kept."""
+        stderr = (
+            "[export] error loading D:/shoot/DSC02.ARW\n"
+            "[export] error loading C:/shoot/DSC01.arw\n"
+            "retrying D:/shoot/DSC02.ARW failed\n"
+        )
+        assert SandboxExecutor(quiet=True)._extract_failed_files(stderr) == [
+            'D:/shoot/DSC02.ARW',
+            'C:/shoot/DSC01.arw',
+        ]
+
+    def test_empty_input(self):
+        """Test that empty or missing stderr yields no files."""
+        sandbox = SandboxExecutor(quiet=True)
+        assert sandbox._extract_failed_files('') == []
+        assert sandbox._extract_failed_files(None) == []
+
+    def test_decoded_from_failed_run(self, monkeypatch):
+        """Test that stderr bytes from a failed run are decoded and scanned."""
+        class FakeProc:
+            returncode = 1
+
+            def communicate(self):
+                return None, b"can't open C:/shoot/DSC01.nef \xff\n"
+
+        monkeypatch.setattr(executor, '_spawn_pinned', lambda *args, **kwargs: FakeProc())
+        job = {'input_folder': Path('C:/shoot'), 'input_folder_fwd': 'C:/shoot', 'output_template': 'out'}
+        profile = {'argv_options': (), 'affinity_mask': 1}
+        result = SandboxExecutor(quiet=True)._run_conversion(job, profile)
+
+        assert not result['success']
+        assert result['failed_files'] == ['C:/shoot/DSC01.nef']
+        assert '\ufffd' in result['error']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
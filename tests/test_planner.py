@@ -0,0 +1,73 @@
+# Unit tests for planner module
+"""Tests for leaf folder discovery and job planning."""
+
+import pytest
+from pathlib import Path
+
+from common.planner import create_conversion_jobs, discover_leaf_folders
+
+
+@pytest.fixture
+def photo_tree(tmp_path):
+    """Create a small input tree with RAW files at several depths."""
+    inpath = tmp_path / 'RAW'
+    shoot_a = inpath / '2025' / 'shoot-a'
+    shoot_b = inpath / '2025' / 'shoot-b'
+    empty = inpath / 'empty'
+    for folder in (shoot_a, shoot_b, empty):
+        folder.mkdir(parents=True)
+
+    (inpath / 'DSC00001.ARW').touch()
+    for name in ('DSC00002.ARW', 'DSC00003.arw', 'notes.txt'):
+        (shoot_a / name).touch()
+    (shoot_b / '2025-12-25_16-34-32_DSC07514.NEF').touch()
+    (shoot_b / 'preview.jpg').touch()
+    (empty / 'readme.md').touch()
+    return inpath
+
+
+class TestDiscoverLeafFolders:
+    """Tests for discover_leaf_folders function."""
+
+    def test_finds_folders_with_counts(self, photo_tree):
+        """Test that every folder with RAW files is found with its RAW count and pattern."""
+        assert discover_leaf_folders(photo_tree) == [
+            (photo_tree, 1, 'plain_dsc'),
+            (photo_tree / '2025' / 'shoot-a', 2, 'plain_dsc'),
+            (photo_tree / '2025' / 'shoot-b', 1, 'datetime_prefix'),
+        ]
+
+    def test_excludes_outpath(self, photo_tree):
+        """Test that the output directory inside the input tree is skipped."""
+        outpath = photo_tree / '2025'
+        assert discover_leaf_folders(photo_tree, outpath) == [(photo_tree, 1, 'plain_dsc')]
+
+    def test_excludes_relative_outpath(self, photo_tree, monkeypatch):
+        """Test that the output directory is skipped when given as a relative path."""
+        monkeypatch.chdir(photo_tree.parent)
+        leaf_folders = discover_leaf_folders(Path('RAW'), Path('RAW/2025'))
+        assert leaf_folders == [(Path('RAW'), 1, 'plain_dsc')]
+
+    def test_missing_inpath(self, tmp_path):
+        """Test that a missing input directory is rejected."""
+        with pytest.raises(ValueError):
+            discover_leaf_folders(tmp_path / 'missing')
+
+
+class TestCreateConversionJobs:
+    """Tests for create_conversion_jobs function."""
+
+    def test_jobs_use_discovered_counts(self, photo_tree, tmp_path):
+        """Test that jobs carry the counts and patterns of their folders."""
+        outpath = tmp_path / 'JPEG'
+        leaf_folders = discover_leaf_folders(photo_tree)
+        jobs, file_counts, total_files = create_conversion_jobs(leaf_folders, photo_tree, outpath)
+
+        assert total_files == 4
+        assert [job['file_count'] for job in jobs] == [1, 2, 1]
+        assert file_counts[photo_tree / '2025' / 'shoot-a'] == 2
+        assert [job['pattern'] for job in jobs] == ['plain_dsc', 'plain_dsc', 'datetime_prefix']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
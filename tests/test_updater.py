@@ -0,0 +1,243 @@
+# Unit tests for updater module
+"""Tests for darktable release lookups and their cache."""
+
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from common.updater import UpdateMonitor, update_check_disabled
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, status_code=200, data=None, headers=None):
+        self.status_code = status_code
+        self._data = data
+        self.headers = headers or {}
+        self.raw = io.BytesIO(json.dumps(data).encode())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(self.status_code)
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    """An UpdateMonitor whose cache lives in a temporary directory."""
+    monkeypatch.setattr(UpdateMonitor, 'CACHE_FILE', tmp_path / 'cache.json')
+    return UpdateMonitor()
+
+
+class FakeGet:
+    """Stand-in for Session.get that serves canned responses and records the headers sent."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def __call__(self, url, headers=None, **kwargs):
+        self.sent_headers.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def _age(monitor, days):
+    """Move the cached last_check the given number of days into the past."""
+    monitor._cache['last_check'] = time.time() - days * 86400
+
+
+class TestGetLatestRelease:
+    """Tests for get_latest_release method."""
+
+    RELEASE = {
+        'tag_name': 'release-5.4.0',
+        'html_url': 'https://github.com/darktable-org/darktable/releases/tag/release-5.4.0',
+        'published_at': '2025-12-20T10:00:00Z',
+    }
+
+    def test_stores_validators(self, monitor, monkeypatch):
+        """Test that ETag and Last-Modified are persisted with the release."""
+        response = FakeResponse(200, self.RELEASE, {'ETag': '"abc"', 'Last-Modified': 'Sat, 20 Dec 2025'})
+        monkeypatch.setattr(requests.Session, 'get', FakeGet(response))
+        assert monitor.get_latest_release()['version'] == '5.4.0'
+
+        cache = json.loads(monitor.CACHE_FILE.read_text())
+        assert cache['etag'] == '"abc"'
+        assert cache['last_modified'] == 'Sat, 20 Dec 2025'
+
+    def test_not_modified_uses_cache(self, monitor, monkeypatch):
+        """Test that a 304 reply revalidates the cached release."""
+        get = FakeGet(
+            FakeResponse(200, self.RELEASE, {'ETag': '"abc"'}),
+            FakeResponse(304),
+        )
+        monkeypatch.setattr(requests.Session, 'get', get)
+        monitor.get_latest_release()
+        _age(monitor, monitor._config.soft_ttl_days + 0.5)
+
+        assert monitor.get_latest_release()['version'] == '5.4.0'
+        assert get.sent_headers[1]['If-None-Match'] == '"abc"'
+        assert monitor._is_cache_fresh()
+
+    def test_expired_cache_refetches(self, monitor, monkeypatch):
+        """Test that a cache past cache_days is fetched unconditionally."""
+        get = FakeGet(
+            FakeResponse(200, self.RELEASE, {'ETag': '"abc"'}),
+            FakeResponse(200, self.RELEASE, {'ETag': '"def"'}),
+        )
+        monkeypatch.setattr(requests.Session, 'get', get)
+        monitor.get_latest_release()
+        _age(monitor, monitor._config.cache_days + 1)
+
+        monitor.get_latest_release()
+        assert 'If-None-Match' not in get.sent_headers[1]
+        assert monitor._cache['etag'] == '"def"'
+
+    def test_iso_last_check_still_read(self, monitor, monkeypatch):
+        """Test that an ISO timestamp from an older cache file is still honored."""
+        get = FakeGet()
+        monkeypatch.setattr(requests.Session, 'get', get)
+        monitor._cache = {
+            'last_check': (datetime.now() - timedelta(hours=1)).isoformat(),
+            'latest_version': '5.4.0',
+        }
+        assert monitor.get_latest_release()['version'] == '5.4.0'
+        assert get.sent_headers == []
+        assert isinstance(monitor._cache['last_check'], float)
+
+    def test_ijson_reads_fields(self, monitor, monkeypatch):
+        """Test that the streamed ijson path extracts the release fields."""
+        pytest.importorskip('ijson')
+        response = FakeResponse(200, {**self.RELEASE, 'assets': [{'tag_name': 'nested'}]})
+        monkeypatch.setattr(requests.Session, 'get', FakeGet(response))
+        release = monitor.get_latest_release()
+        assert release['version'] == '5.4.0'
+        assert release['published'] == self.RELEASE['published_at']
+
+    def test_ijson_read_error(self, monitor, monkeypatch):
+        """Test that a connection dropped mid-body yields None, not a traceback."""
+        pytest.importorskip('ijson')
+        from urllib3.exceptions import ProtocolError
+
+        class BrokenRaw(io.BytesIO):
+            def read(self, *args):
+                raise ProtocolError("Connection broken")
+
+        response = FakeResponse(200, self.RELEASE)
+        response.raw = BrokenRaw()
+        monkeypatch.setattr(requests.Session, 'get', FakeGet(response))
+        assert monitor.get_latest_release() is None
+
+    def test_fresh_cache_skips_request(self, monitor, monkeypatch):
+        """Test that a valid cache is served without a request."""
+        get = FakeGet(FakeResponse(200, self.RELEASE))
+        monkeypatch.setattr(requests.Session, 'get', get)
+        monitor.get_latest_release()
+        monitor.get_latest_release()
+        assert len(get.sent_headers) == 1
+
+
+class TestDisabled:
+    """Tests for turning update checks off with RAW2JPEG_NO_UPDATE_CHECK."""
+
+    def test_env_var_skips_requests(self, tmp_path, monkeypatch):
+        """Test that a disabled monitor neither reads the cache nor calls GitHub."""
+        monkeypatch.setenv('RAW2JPEG_NO_UPDATE_CHECK', '1')
+        monkeypatch.setattr(UpdateMonitor, 'CACHE_FILE', tmp_path / 'cache.json')
+        (tmp_path / 'cache.json').write_text('{"latest_version": "5.4.0"}')
+        get = FakeGet()
+        monkeypatch.setattr(requests.Session, 'get', get)
+
+        monitor = UpdateMonitor()
+        assert monitor._cache == {}
+        assert monitor.get_latest_release() is None
+        assert monitor.check_for_updates() is None
+        assert get.sent_headers == []
+
+    def test_zero_keeps_checks_enabled(self, monkeypatch):
+        """Test that RAW2JPEG_NO_UPDATE_CHECK=0 does not disable checks."""
+        monkeypatch.setenv('RAW2JPEG_NO_UPDATE_CHECK', '0')
+        assert not update_check_disabled()
+
+
+class TestSaveCache:
+    """Tests for _save_cache method."""
+
+    def test_round_trip(self, monitor):
+        """Test that a saved cache is loaded back by a new monitor."""
+        monitor._cache = {'latest_version': '5.4.0', 'etag': '"abc"'}
+        monitor._save_cache()
+        assert UpdateMonitor()._cache == monitor._cache
+        assert not monitor.CACHE_FILE.with_suffix('.tmp').exists()
+
+    def test_unchanged_cache_not_rewritten(self, monitor, monkeypatch):
+        """Test that saving identical content skips the write."""
+        monitor._cache = {'latest_version': '5.4.0'}
+        monitor._save_cache()
+
+        replaced = []
+        monkeypatch.setattr('common.updater.os.replace', lambda *args: replaced.append(args))
+        monitor._save_cache()
+        UpdateMonitor()._save_cache()
+        assert replaced == []
+
+
+class TestStartAsync:
+    """Tests for start_async and async_result methods."""
+
+    def test_result_after_completion(self, monitor, monkeypatch):
+        """Test that the background check result is returned once done."""
+        expected = {'update_available': True, 'current': '5.2.0', 'latest': '5.4.0', 'url': None}
+        monkeypatch.setattr(monitor, 'check_for_updates', lambda: expected)
+        monitor.start_async().join()
+        assert monitor.async_result() == expected
+
+    def test_unfinished_check_is_skipped(self, monitor, monkeypatch):
+        """Test that a check still running after the timeout yields None."""
+        release = threading.Event()
+        monkeypatch.setattr(monitor, 'check_for_updates', release.wait)
+        thread = monitor.start_async()
+        assert monitor.async_result(timeout=0.01) is None
+        release.set()
+        thread.join()
+
+    def test_errors_are_swallowed(self, monitor, monkeypatch):
+        """Test that an exception in the background check yields None."""
+        def boom():
+            raise RuntimeError("network down")
+        monkeypatch.setattr(monitor, 'check_for_updates', boom)
+        monitor.start_async().join()
+        assert monitor.async_result() is None
+
+
+class TestCompareVersions:
+    """Tests for _compare_versions method."""
+
+    def test_ordering(self):
+        """Test that versions compare numerically, not lexically."""
+        assert UpdateMonitor._compare_versions('5.4.0', '5.10.0') == -1
+        assert UpdateMonitor._compare_versions('5.4.1', '5.4.0') == 1
+        assert UpdateMonitor._compare_versions('5.4.0', '5.4.0') == 0
+
+    def test_different_lengths(self):
+        """Test that missing components count as zero."""
+        assert UpdateMonitor._compare_versions('5.4', '5.4.0') == 0
+        assert UpdateMonitor._compare_versions('5.4', '5.4.1') == -1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
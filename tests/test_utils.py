@@ -2,10 +2,6 @@
 """Tests for filename pattern detection."""
 
 import pytest
-from pathlib import Path
-
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from common.utils import (
     detect_filename_pattern,
@@ -31,6 +27,14 @@ class TestDetectFilenamePattern:
         assert detect_filename_pattern("DSC07514.ARW") == 'plain_dsc'
         assert detect_filename_pattern("DSC08907.arw") == 'plain_dsc'
     
+    def test_plain_dsc_edge_cases(self):
+        """Test names that look almost like the plain DSC pattern."""
+        assert detect_filename_pattern("DSC.ARW") == 'unknown'
+        assert detect_filename_pattern("07514.ARW") == 'unknown'
+        assert detect_filename_pattern("DSC07514.") == 'unknown'
+        assert detect_filename_pattern("DSC0751².ARW") == 'unknown'
+        assert detect_filename_pattern("DSC07514.A_R") == 'plain_dsc'
+    
     def test_unknown_pattern(self):
         """Test detection of unknown pattern."""
         assert detect_filename_pattern("random_photo.jpg") == 'unknown'
@@ -59,6 +63,12 @@ class TestGetOutputTemplate:
         """Test that output uses forward slashes."""
         template = get_output_template('plain_dsc', 'G:/jpeg')
         assert '\\' not in template
+    
+    def test_unquoted(self):
+        """Test that the template is a plain argv value without shell quotes."""
+        template = get_output_template('datetime_prefix', 'G:/jpeg')
+        assert template.startswith('G:/jpeg/')
+        assert template.endswith('.jpg')
 
 
 if __name__ == '__main__':